@@ -0,0 +1,194 @@
+import asyncio
+import math
+import time
+from fastapi import HTTPException
+from sqlalchemy import select, and_, func, bindparam, literal_column, Interval
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from app.utils.cache import TTLCache
+
+
+class AuthorFloodProtection:
+    """
+    Limits how many rows of a model each author may create within a time window.
+
+    The model needs `author_id` and `created_at` columns. Subclasses fix the
+    model, the advisory lock key and the word used in error messages.
+    """
+
+    def __init__(self, model, noun: str, lock_key: int, max_items: int, time_window: int):
+        """
+        Initialize flood protection.
+
+        Args:
+            model: Mapped class whose rows are limited
+            noun: What a row is called in messages, e.g. "story"
+            lock_key: First key of the per-author advisory lock, unique per model
+            max_items: Maximum number of rows allowed in time window
+            time_window: Time window in minutes
+        """
+        self.model = model
+        self.noun = noun
+        self.max_items = max_items
+        self.time_window = time_window
+        self._window_seconds = time_window * 60
+        self._window_td = timedelta(minutes=time_window)
+        # Per-user token bucket: user_id -> (tokens, updated_at). An empty
+        # bucket is full again one window after it was last written, so it can
+        # be dropped by then
+        self._refill_rate = max_items / self._window_seconds
+        self._buckets = TTLCache(maxsize=10000, ttl=self._window_seconds)
+        # Users the database refused: user_id -> monotonic time at which their
+        # oldest row leaves the window. Never more than one window ahead
+        self._blocked_until = TTLCache(maxsize=10000, ttl=self._window_seconds)
+        # Single-flight for the refusal-path lookup: concurrent refusals for the
+        # same user share one query, and its result is reused for a short time
+        self._inflight: dict[int, asyncio.Future] = {}
+        self._cache = TTLCache(maxsize=1024, ttl=1.0)
+
+        # Built once; only the bound values change between calls
+        self._lock_stmt = select(
+            func.pg_advisory_xact_lock(literal_column(str(int(lock_key))), bindparam('user_id'))
+        )
+        self._window_stmt = select(func.count(), func.min(model.created_at)).filter(
+            and_(
+                model.author_id == bindparam('user_id'),
+                model.created_at >= func.now() - bindparam('window', type_=Interval)
+            )
+        )
+
+    def _tokens(self, user_id: int, now: float) -> float:
+        """Tokens left in the user's bucket at `now`."""
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            return self.max_items
+        tokens, updated_at = bucket
+        return min(self.max_items, tokens + (now - updated_at) * self._refill_rate)
+
+    def _rate_limited(self, remaining: float) -> HTTPException:
+        # Rounded up, so the user is never told to retry before it can succeed
+        remaining = max(1, math.ceil(remaining))
+        minutes, seconds = divmod(remaining, 60)
+        return HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded. You can create new {self.noun} in {minutes} minutes and {seconds} seconds"
+        )
+
+    def within_limit(self, user_id: int):
+        """
+        SQL condition that holds while the user is under the limit.
+
+        Meant for the WHERE clause of the INSERT ... SELECT that creates the
+        row, so the check and the write happen in a single statement. Call
+        `lock` first: under READ COMMITTED two concurrent inserts would
+        otherwise both count the same rows and both pass.
+        """
+        item_count = select(func.count()).select_from(self.model).filter(
+            and_(
+                self.model.author_id == user_id,
+                self.model.created_at >= func.now() - self._window_td
+            )
+        ).scalar_subquery()
+        return item_count < self.max_items
+
+    async def lock(self, user_id: int, db: AsyncSession) -> None:
+        """
+        Serialize the user's creation of rows until the current transaction ends.
+
+        The next creation waits for this one to commit, so its `within_limit`
+        count includes the row inserted here.
+
+        Args:
+            user_id: ID of the user
+            db: Database session
+        """
+        await db.execute(self._lock_stmt, {'user_id': user_id})
+
+    def check_rate_limit(self, user_id: int) -> bool:
+        """
+        Check the rows this worker has recently created for the user.
+
+        This is a cheap pre-check that never touches the database; the
+        authoritative check is `within_limit`. Each user has a token bucket
+        holding up to the limit, refilled at limit / window tokens per second,
+        and a user the database has refused is turned away until the time
+        `raise_rate_limited` worked out.
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            bool: True if user can create another row
+
+        Raises:
+            HTTPException: If rate limit is exceeded
+        """
+        now = time.monotonic()
+        blocked_until = self._blocked_until.get(user_id)
+        if blocked_until is not None and blocked_until > now:
+            raise self._rate_limited(blocked_until - now)
+
+        tokens = self._tokens(user_id, now)
+        if tokens < 1:
+            raise self._rate_limited((1 - tokens) / self._refill_rate)
+        return True
+
+    def record(self, user_id: int) -> None:
+        """Count a row that has just been created by the user."""
+        now = time.monotonic()
+        self._buckets.set(user_id, (max(0.0, self._tokens(user_id, now) - 1), now))
+
+    async def _window_stats(self, user_id: int, db: AsyncSession) -> Tuple[int, Optional[datetime]]:
+        """Number of the user's rows inside the window and the oldest one's creation time."""
+        cached = self._cache.get(user_id)
+        if cached is not None:
+            return cached
+
+        future = self._inflight.get(user_id)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[user_id] = future
+        try:
+            result = await db.execute(
+                self._window_stmt, {'user_id': user_id, 'window': self._window_td}
+            )
+            stats = tuple(result.one())
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark as retrieved in case nobody is waiting
+            raise
+        else:
+            future.set_result(stats)
+            self._cache.set(user_id, stats)
+            return stats
+        finally:
+            del self._inflight[user_id]
+            if not future.done():
+                future.cancel()
+
+    async def raise_rate_limited(self, user_id: int, db: AsyncSession) -> None:
+        """
+        Raise the 429 for an insert that was refused by `within_limit`.
+
+        Args:
+            user_id: ID of the user
+            db: Database session
+
+        Raises:
+            HTTPException: Always
+        """
+        count, oldest = await self._window_stats(user_id, db)
+
+        remaining = 0.0
+        if count >= self.max_items and oldest is not None:
+            remaining = max(0.0, (oldest + self._window_td - datetime.now(timezone.utc)).total_seconds())
+        # Refuse locally until the oldest row leaves the window. After that
+        # the database decides again, so the bucket starts out full rather
+        # than holding a deficit that would refuse attempts the database allows
+        if remaining > 0:
+            self._blocked_until.set(user_id, time.monotonic() + remaining)
+        self._buckets.delete(user_id)
+        raise self._rate_limited(remaining)
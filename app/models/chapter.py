@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -7,12 +7,15 @@ class Chapter(Base):
     __tablename__ = "chapters"
     __table_args__ = (
         UniqueConstraint('story_id', 'chapter_number', name='unique_chapter_number'),
+        Index('ix_chapters_author_created', 'author_id', text('created_at DESC')),
     )
 
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String(100), nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    title = Column(String(100), nullable=False)
     content = Column(Text, nullable=False)
     story_id = Column(Integer, ForeignKey("stories.id", ondelete="CASCADE"), nullable=False)
+    # Copy of stories.author_id so per-author queries don't need a join
+    author_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     chapter_number = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
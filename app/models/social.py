@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, UniqueConstraint, Boolean, Index
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -11,7 +11,7 @@ class Like(Base):
         Index("ix_likes_story_id", "story_id"),
     )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     story_id = Column(Integer, ForeignKey("stories.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -22,12 +22,11 @@ class Like(Base):
 class Bookmark(Base):
     __tablename__ = "bookmarks"
     __table_args__ = (
-        Index('idx_bookmark_user_stories', 'user_id', 'story_id'),
+        UniqueConstraint("user_id", "story_id", name="unique_user_story_bookmark"),
         Index('idx_bookmark_story_created', 'story_id', 'created_at'),
         Index('idx_bookmark_user_created', 'user_id', 'created_at'),
     )
 
-    # Changed primary key to include created_at since we're not using partitioning anymore
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     story_id = Column(Integer, ForeignKey("stories.id", ondelete="CASCADE"), nullable=False)
@@ -41,9 +40,12 @@ class UserFollow(Base):
     __tablename__ = "user_follows"
     __table_args__ = (
         UniqueConstraint("follower_id", "followed_id", name="unique_user_follow"),
+        # Newest-first pages of a user's followers / followings
+        Index("ix_user_follows_followed_id", "followed_id", text("id DESC")),
+        Index("ix_user_follows_follower_id", "follower_id", text("id DESC")),
     )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     follower_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     followed_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -54,13 +56,12 @@ class UserFollow(Base):
 
 class StoryView(Base):
     __tablename__ = "story_views"
-
-    id = Column(Integer, primary_key=True, index=True)
-    story_id = Column(Integer, ForeignKey("stories.id", ondelete="CASCADE"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    viewed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-
     # Ensure one view per user per story
     __table_args__ = (
         UniqueConstraint('story_id', 'user_id', name='uix_story_user_view'),
-    )
\ No newline at end of file
+    )
+
+    id = Column(Integer, primary_key=True)
+    story_id = Column(Integer, ForeignKey("stories.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    viewed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, Float
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, Float, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -19,9 +19,19 @@ class Genre(enum.Enum):
 
 class Story(Base):
     __tablename__ = "stories"
+    __table_args__ = (
+        Index('ix_stories_author_created', 'author_id', text('created_at DESC')),
+        Index('ix_stories_genre', 'genre'),
+        # Full-text search of list_stories; the query must use this same expression
+        Index(
+            'ix_stories_search',
+            text("to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(summary, ''))"),
+            postgresql_using='gin'
+        ),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String(50), nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    title = Column(String(50), nullable=False)
     summary = Column(Text, nullable=True)
     genre = Column(Enum(Genre), nullable=False)
     cover_image_url = Column(String, nullable=True)
@@ -30,6 +40,8 @@ class Story(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
     rating = Column(Float, default=0.0)
     views = Column(Integer, default=0)
+    likes_count = Column(Integer, nullable=False, default=0, server_default="0")
+    bookmarks_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     author = relationship("User", back_populates="stories")
     chapters = relationship("Chapter", back_populates="story", cascade="all, delete-orphan")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Computed
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -6,14 +6,17 @@ from database import Base
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     vk_id = Column(Integer, unique=True, index=True)
     full_name = Column(String(30), nullable=False)
     pseudonym = Column(String(30), unique=True, nullable=True)
+    # Name shown for the user: the pseudonym if set, otherwise the full name
+    display_name = Column(String(30), Computed("coalesce(nullif(pseudonym, ''), full_name)", persisted=True))
     bio = Column(Text, nullable=True)
     avatar_url = Column(String, nullable=True)
     role = Column(String(10), default="AUTHOR")
     is_active = Column(Boolean, default=True)
+    follower_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
 
@@ -1,20 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import insert, update, delete, literal, bindparam
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
-from typing import List
+from typing import List, Optional, Tuple
 
 from app.chapter_flood_protection import ChapterFloodProtection
 from app.models.chapter import Chapter
 from app.models.story import Story
 from app.models.user import User
 from app.schemas.chapter import ChapterCreate, ChapterUpdate, ChapterInDB
+from app.utils.cache import TTLCache
 from dependencies import get_current_user, get_db
+import hashlib
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
+
+# Read statements are built once; only the bound values change between calls
+_CHAPTER_STMT = select(Chapter).filter(Chapter.id == bindparam('chapter_id'))
+_CHAPTER_EXISTS_STMT = select(Chapter.id).filter(Chapter.id == bindparam('chapter_id'))
+_STORY_AUTHOR_STMT = select(Story.author_id).filter(Story.id == bindparam('story_id'))
+_STORY_CHAPTERS_STMT = (
+    select(Chapter)
+    .filter(Chapter.story_id == bindparam('story_id'), Chapter.chapter_number > bindparam('after'))
+    .order_by(Chapter.chapter_number)
+    .limit(bindparam('limit'))
+)
+
 flood_protection = ChapterFloodProtection(max_chapters=10, time_window=20)
+# Serialized responses of the read endpoints. Writes through this worker drop
+# the affected entries; other workers pick up changes once an entry expires
+response_cache = TTLCache(maxsize=1024, ttl=60)
+chapter_list_adapter = TypeAdapter(List[ChapterInDB])
+CHAPTER_PAGE_SIZE = 100
+
+def _with_etag(body: bytes) -> Tuple[str, bytes]:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', body
+
+def _json_response(request: Request, entry: Tuple[str, bytes], headers: Optional[dict] = None) -> Response:
+    """Serve a serialized body, or 304 if the client already has this version."""
+    etag, body = entry
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=60", **(headers or {})}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def _raise_not_found_or_forbidden(chapter_id: int, user_id: int, db: AsyncSession):
+    """Explain why an ownership-guarded write on a chapter matched no rows."""
+    if await db.scalar(_CHAPTER_EXISTS_STMT, {'chapter_id': chapter_id}) is None:
+        logger.warning("Chapter with id %s not found", chapter_id)
+        raise HTTPException(status_code=404, detail="Chapter not found")
+    logger.warning("User %s is not the author of the story for chapter %s", user_id, chapter_id)
+    raise HTTPException(status_code=403, detail="You're not the author of this story")
 
 @router.post("/", response_model=ChapterInDB)
 async def create_chapter(
@@ -23,58 +64,82 @@ async def create_chapter(
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        # Verify story exists and user is the author
-        query = select(Story).filter(Story.id == chapter.story_id)
-        result = await db.execute(query)
-        story = result.scalar_one_or_none()
-
-        if not story:
-            logger.warning(f"Story with id {chapter.story_id} not found")
-            raise HTTPException(status_code=404, detail="Story not found")
-        if story.author_id != current_user.id:
-            logger.warning(f"User {current_user.id} is not the author of story {chapter.story_id}")
-            raise HTTPException(status_code=403, detail="You're not the author of this story")
-
-        # Check flood protection
-        await flood_protection.check_rate_limit(
-            story_id=chapter.story_id,
-            user_id=current_user.id,
-            db=db
+        # Check flood protection (local pre-check, the insert below enforces the limit)
+        flood_protection.check_rate_limit(current_user.id)
+
+        await flood_protection.lock(current_user.id, db)
+
+        # Create chapter in one statement: it only inserts if the user is the
+        # story's author and hasn't hit the flood limit in the meantime
+        values = {**chapter.dict(exclude={'story_id'}), 'author_id': current_user.id}
+        result = await db.execute(
+            insert(Chapter)
+            .from_select(
+                [*values, 'story_id'],
+                select(
+                    *[literal(value, Chapter.__table__.c[key].type) for key, value in values.items()],
+                    Story.id
+                )
+                .where(
+                    Story.id == chapter.story_id,
+                    Story.author_id == current_user.id,
+                    flood_protection.within_limit(current_user.id)
+                )
+            )
+            .returning(Chapter)
         )
+        db_chapter = result.scalar_one_or_none()
+
+        if db_chapter is None:
+            # Nothing inserted: find out which condition refused it
+            author_id = await db.scalar(_STORY_AUTHOR_STMT, {'story_id': chapter.story_id})
+            if author_id is None:
+                logger.warning("Story with id %s not found", chapter.story_id)
+                raise HTTPException(status_code=404, detail="Story not found")
+            if author_id != current_user.id:
+                logger.warning("User %s is not the author of story %s", current_user.id, chapter.story_id)
+                raise HTTPException(status_code=403, detail="You're not the author of this story")
+            await flood_protection.raise_rate_limited(current_user.id, db)
 
-        # Create chapter
-        db_chapter = Chapter(**chapter.dict())
-        db.add(db_chapter)
         await db.commit()
-        await db.refresh(db_chapter)
-        logger.info(f"Successfully created chapter {db_chapter.id} for story {chapter.story_id}")
+        flood_protection.record(current_user.id)
+        response_cache.delete(('story', chapter.story_id))
+        logger.info("Successfully created chapter %s for story %s", db_chapter.id, chapter.story_id)
         return db_chapter
 
+    except IntegrityError:
+        # unique_chapter_number: the story already has a chapter with this number
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Chapter number already exists")
     except HTTPException as http_exc:
         await db.rollback()
         raise http_exc
     except Exception as e:
         await db.rollback()
-        logger.error(f"Error creating chapter: {str(e)}")
+        logger.error("Error creating chapter: %s", e)
         raise HTTPException(status_code=500, detail="An error occurred while creating the chapter")
 
 @router.get("/{chapter_id}", response_model=ChapterInDB)
 async def get_chapter(
     chapter_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        query = select(Chapter).filter(Chapter.id == chapter_id)
-        result = await db.execute(query)
-        chapter = result.scalar_one_or_none()
-        if not chapter:
-            logger.warning(f"Chapter with id {chapter_id} not found")
-            raise HTTPException(status_code=404, detail="Chapter not found")
-        return chapter
+        entry = response_cache.get(('chapter', chapter_id))
+        if entry is None:
+            result = await db.execute(_CHAPTER_STMT, {'chapter_id': chapter_id})
+            chapter = result.scalar_one_or_none()
+            if not chapter:
+                logger.warning("Chapter with id %s not found", chapter_id)
+                raise HTTPException(status_code=404, detail="Chapter not found")
+            entry = _with_etag(ChapterInDB.model_validate(chapter).model_dump_json().encode())
+            response_cache.set(('chapter', chapter_id), entry)
+        return _json_response(request, entry)
     except HTTPException as http_exc:
         raise http_exc
     except Exception as e:
-        logger.error(f"Error fetching chapter {chapter_id}: {str(e)}")
+        logger.error("Error fetching chapter %s: %s", chapter_id, e)
         raise HTTPException(status_code=500, detail="An error occurred while fetching the chapter")
 
 @router.put("/{chapter_id}", response_model=ChapterInDB)
@@ -85,29 +150,31 @@ async def update_chapter(
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        query = select(Chapter).options(joinedload(Chapter.story)).filter(Chapter.id == chapter_id)
-        result = await db.execute(query)
+        # Ownership is part of the WHERE clause, so check and write are one statement
+        result = await db.execute(
+            update(Chapter)
+            .where(Chapter.id == chapter_id, Chapter.author_id == current_user.id)
+            .values(**chapter_update.dict(exclude_unset=True))
+            .returning(Chapter)
+            .execution_options(synchronize_session=False)
+        )
         db_chapter = result.scalar_one_or_none()
 
         if not db_chapter:
-            logger.warning(f"Chapter with id {chapter_id} not found")
-            raise HTTPException(status_code=404, detail="Chapter not found")
-        if db_chapter.story.author_id != current_user.id:
-            logger.warning(f"User {current_user.id} is not the author of the story for chapter {chapter_id}")
-            raise HTTPException(status_code=403, detail="You're not the author of this story")
-
-        for field, value in chapter_update.dict(exclude_unset=True).items():
-            setattr(db_chapter, field, value)
+            await _raise_not_found_or_forbidden(chapter_id, current_user.id, db)
 
         await db.commit()
-        await db.refresh(db_chapter)
-        logger.info(f"Successfully updated chapter {chapter_id}")
+        response_cache.delete(('chapter', chapter_id), ('story', db_chapter.story_id))
+        logger.info("Successfully updated chapter %s", chapter_id)
         return db_chapter
     except HTTPException as http_exc:
+        await db.rollback()
         raise http_exc
     except Exception as e:
-        logger.error(f"Error updating chapter {chapter_id}: {str(e)}")
+        await db.rollback()
+        logger.error("Error updating chapter %s: %s", chapter_id, e)
         raise HTTPException(status_code=500, detail="An error occurred while updating the chapter")
+
 @router.delete("/{chapter_id}", status_code=204)
 async def delete_chapter(
     chapter_id: int,
@@ -115,38 +182,57 @@ async def delete_chapter(
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        # Используем select вместо db.get для асинхронного получения главы
-        query = select(Chapter).options(joinedload(Chapter.story)).filter(Chapter.id == chapter_id)
-        result = await db.execute(query)
-        db_chapter = result.scalar_one_or_none()
-
-        if not db_chapter:
-            logger.warning(f"Chapter with id {chapter_id} not found")
-            raise HTTPException(status_code=404, detail="Chapter not found")
+        result = await db.execute(
+            delete(Chapter)
+            .where(Chapter.id == chapter_id, Chapter.author_id == current_user.id)
+            .returning(Chapter.story_id)
+            .execution_options(synchronize_session=False)
+        )
+        story_id = result.scalar_one_or_none()
 
-        if db_chapter.story.author_id != current_user.id:
-            logger.warning(f"User {current_user.id} is not the author of the story for chapter {chapter_id}")
-            raise HTTPException(status_code=403, detail="You're not the author of this story")
+        if story_id is None:
+            await _raise_not_found_or_forbidden(chapter_id, current_user.id, db)
 
-        await db.delete(db_chapter)
         await db.commit()
-        logger.info(f"Successfully deleted chapter {chapter_id}")
+        response_cache.delete(('chapter', chapter_id), ('story', story_id))
+        logger.info("Successfully deleted chapter %s", chapter_id)
     except HTTPException as http_exc:
+        await db.rollback()
         raise http_exc
     except Exception as e:
-        logger.error(f"Error deleting chapter {chapter_id}: {str(e)}")
+        await db.rollback()
+        logger.error("Error deleting chapter %s: %s", chapter_id, e)
         raise HTTPException(status_code=500, detail="An error occurred while deleting the chapter")
 
 @router.get("/story/{story_id}", response_model=List[ChapterInDB])
 async def list_chapters(
     story_id: int,
+    request: Request,
+    after: Optional[int] = Query(None, ge=0, description="Return chapters numbered after this one"),
+    limit: int = Query(CHAPTER_PAGE_SIZE, ge=1, le=500),
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        query = select(Chapter).filter(Chapter.story_id == story_id).order_by(Chapter.chapter_number)
-        result = await db.execute(query)
-        chapters = result.scalars().all()
-        return chapters
+        # Only the first page is cached, it is the one every reader opens
+        first_page = after is None and limit == CHAPTER_PAGE_SIZE
+        cached = response_cache.get(('story', story_id)) if first_page else None
+        if cached is None:
+            # Chapter numbers start at 1, so "after 0" is the first page
+            result = await db.execute(
+                _STORY_CHAPTERS_STMT, {'story_id': story_id, 'after': after or 0, 'limit': limit}
+            )
+            chapters = result.scalars().all()
+            entry = _with_etag(chapter_list_adapter.dump_json(
+                chapter_list_adapter.validate_python(chapters, from_attributes=True)
+            ))
+            # A full page may have more chapters after it; the client passes
+            # this header back as `after` to fetch them
+            headers = {"X-Next-After": str(chapters[-1].chapter_number)} if len(chapters) == limit else {}
+            cached = entry, headers
+            if first_page:
+                response_cache.set(('story', story_id), cached)
+        entry, headers = cached
+        return _json_response(request, entry, headers)
     except Exception as e:
-        logger.error(f"Error listing chapters for story {story_id}: {str(e)}")
+        logger.error("Error listing chapters for story %s: %s", story_id, e)
         raise HTTPException(status_code=500, detail="An error occurred while listing chapters")
\ No newline at end of file
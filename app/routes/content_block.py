@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert, select, literal
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
 from app.models.story import Story
@@ -12,19 +13,26 @@ router = APIRouter()
 @router.post("/complaint", status_code=200)
 async def create_story_complaint(
         content: StoryBlock,
+        current_user: User = Depends(get_current_user),
         db: AsyncSession = Depends(get_db)
 ):
 
-    # Создаем новую жалобу
-    new_complaint = Block(
-        story_id=content.story_id,
-        user_id=content.user_id,
-        author_id=content.author_id,
-        reason=content.reason
+    # Создаем новую жалобу, если история существует; автор берется из самой истории
+    complaint_id = await db.scalar(
+        insert(Block)
+        .from_select(
+            ['user_id', 'reason', 'story_id', 'author_id'],
+            select(
+                literal(current_user.id, Block.user_id.type),
+                literal(content.reason, Block.reason.type),
+                Story.id,
+                Story.author_id
+            ).filter(Story.id == content.story_id)
+        )
+        .returning(Block.story_id)
     )
-
-    db.add(new_complaint)
+    if complaint_id is None:
+        raise HTTPException(status_code=404, detail="Story not found")
     await db.commit()
-    await db.refresh(new_complaint)
 
-    return {"message": "Complaint submitted successfully", "complaint_id": new_complaint.story_id}
\ No newline at end of file
+    return {"message": "Complaint submitted successfully", "complaint_id": content.story_id}
\ No newline at end of file
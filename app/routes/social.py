@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import joinedload
-from typing import List
+from sqlalchemy import select, update, delete, and_, exists, literal, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import aliased
+from typing import List, Optional
 import asyncio
 
+from app.models.chapter import Chapter
 from app.models.social import Like, Bookmark, UserFollow
 from app.models.user import User
 from app.models.story import Story
@@ -14,10 +15,67 @@ from app.schemas.social import (
     BookmarkCreate, BookmarkResponse,
     UserFollowCreate, UserFollowResponse
 )
-from dependencies import get_current_user, get_db, logger
+from dependencies import get_current_user, get_db, get_read_db, logger
 
 router = APIRouter()
 
+# Lookups that explain a refused insert
+_STORY_AUTHOR_ACTIVE_STMT = (
+    select(User.is_active)
+    .join(Story, Story.author_id == User.id)
+    .filter(Story.id == bindparam('story_id'))
+)
+_USER_ACTIVE_STMT = select(User.is_active).filter(User.id == bindparam('user_id'))
+
+
+def _from_available_story(story_id: int, *columns):
+    """
+    Select `columns` followed by the story's id, if the story exists and its
+    author is active. Used as the source of INSERT ... SELECT statements.
+    """
+    return (
+        select(*columns, Story.id)
+        .join(User, User.id == Story.author_id)
+        .filter(and_(Story.id == story_id, User.is_active))
+    )
+
+
+def _write_and_count(write_stmt, parent_id: str, counter, delta: int):
+    """
+    Run an INSERT/DELETE ... RETURNING as a CTE and add `delta` to the
+    denormalized `counter` of the parent row whose id the write returned as
+    `parent_id`. The written row comes back with the new value as `new_count`;
+    nothing comes back if nothing was written. updated_at is kept as is, so a
+    counter change doesn't show as an edit of the parent.
+    """
+    written = write_stmt.cte('written')
+    parent = counter.class_
+    counted = (
+        update(parent)
+        .where(parent.id.in_(select(written.c[parent_id])))
+        .values({counter: counter + delta, parent.updated_at: parent.updated_at})
+        .returning(counter.label('new_count'))
+        .cte('counted')
+    )
+    return select(written, counted.c.new_count)
+
+
+async def _check_story_available(story_id: int, db: AsyncSession) -> None:
+    """Raise the 404/403 for a story that `_from_available_story` did not match."""
+    author_active = await db.scalar(_STORY_AUTHOR_ACTIVE_STMT, {'story_id': story_id})
+
+    if author_active is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Story not found"
+        )
+
+    if not author_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This story is not available"
+        )
+
 
 @router.post("/likes", response_model=LikeResponse, status_code=status.HTTP_201_CREATED)
 async def create_like(
@@ -34,68 +92,36 @@ async def create_like(
                 detail="Your account is not active"
             )
 
-        # Check if story exists and is available
-        story = await db.scalar(
-            select(Story)
-            .options(joinedload(Story.author))
-            .filter(Story.id == like.story_id)
-        )
-
-        if not story:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Story not found"
+        # Create like, provided the story is available; a duplicate inserts nothing
+        result = await db.execute(_write_and_count(
+            pg_insert(Like)
+            .from_select(
+                ['user_id', 'story_id'],
+                _from_available_story(like.story_id, literal(current_user.id, Like.user_id.type))
             )
-
-        if not story.author.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="This story is not available"
-            )
-
-        # Check for existing like
-        existing_like = await db.scalar(
-            select(Like).filter(
-                and_(
-                    Like.user_id == current_user.id,
-                    Like.story_id == like.story_id
-                )
-            )
-        )
-
-        if existing_like:
+            .on_conflict_do_nothing(index_elements=['user_id', 'story_id'])
+            .returning(Like.id, Like.story_id, Like.created_at),
+            'story_id', Story.likes_count, 1
+        ))
+        db_like = result.first()
+
+        if db_like is None:
+            await _check_story_available(like.story_id, db)
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="You have already liked this story"
             )
 
-        # Create like
-        db_like = Like(user_id=current_user.id, story_id=like.story_id)
-        db.add(db_like)
         await db.commit()
-        await db.refresh(db_like)
-
-        # Get updated likes count
-        likes_count = await db.scalar(
-            select(func.count())
-            .select_from(Like)
-            .filter(Like.story_id == like.story_id)
-        )
 
         return LikeResponse(
             id=db_like.id,
             user_id=current_user.id,
             story_id=like.story_id,
             created_at=db_like.created_at,
-            likes_count=likes_count
+            likes_count=db_like.new_count
         )
 
-    except IntegrityError:
-        await db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="You have already liked this story"
-        )
     except HTTPException:
         await db.rollback()
         raise
@@ -122,23 +148,19 @@ async def delete_like(
                 detail="Your account is not active"
             )
 
-        # Find like
-        like = await db.scalar(
-            select(Like).filter(
-                and_(
-                    Like.user_id == current_user.id,
-                    Like.story_id == story_id
-                )
-            )
-        )
+        result = await db.execute(_write_and_count(
+            delete(Like)
+            .where(and_(Like.user_id == current_user.id, Like.story_id == story_id))
+            .returning(Like.story_id),
+            'story_id', Story.likes_count, -1
+        ))
 
-        if not like:
+        if result.first() is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Like not found"
             )
 
-        await db.delete(like)
         await db.commit()
 
     except HTTPException:
@@ -167,75 +189,45 @@ async def create_bookmark(
                 detail="Your account is not active"
             )
 
-        # Check if story exists and is available
-        story = await db.scalar(
-            select(Story)
-            .options(joinedload(Story.author))
-            .filter(Story.id == bookmark.story_id)
-        )
-
-        if not story:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Story not found"
-            )
-
-        if not story.author.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="This story is not available"
+        chapter_exists = exists().where(
+            and_(
+                Chapter.story_id == bookmark.story_id,
+                Chapter.chapter_number == bookmark.last_read_chapter
             )
+        )
 
-        # Verify chapter number if provided
+        # Create bookmark, provided the story is available and has the chapter;
+        # a duplicate inserts nothing
+        source = _from_available_story(
+            bookmark.story_id,
+            literal(current_user.id, Bookmark.user_id.type),
+            literal(bookmark.last_read_chapter, Bookmark.last_read_chapter.type)
+        )
         if bookmark.last_read_chapter is not None:
-            chapter_exists = await db.scalar(
-                select(func.count())
-                .select_from(Story)
-                .filter(
-                    and_(
-                        Story.id == bookmark.story_id,
-                        Story.chapters >= bookmark.last_read_chapter
-                    )
-                )
-            )
-            if not chapter_exists:
+            source = source.filter(chapter_exists)
+
+        result = await db.execute(_write_and_count(
+            pg_insert(Bookmark)
+            .from_select(['user_id', 'last_read_chapter', 'story_id'], source)
+            .on_conflict_do_nothing(index_elements=['user_id', 'story_id'])
+            .returning(Bookmark.id, Bookmark.story_id, Bookmark.last_read_chapter, Bookmark.created_at),
+            'story_id', Story.bookmarks_count, 1
+        ))
+        db_bookmark = result.first()
+
+        if db_bookmark is None:
+            await _check_story_available(bookmark.story_id, db)
+            if bookmark.last_read_chapter is not None and not await db.scalar(select(chapter_exists)):
                 raise HTTPException(
                     status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                     detail="Invalid chapter number"
                 )
-
-        # Check for existing bookmark
-        existing_bookmark = await db.scalar(
-            select(Bookmark).filter(
-                and_(
-                    Bookmark.user_id == current_user.id,
-                    Bookmark.story_id == bookmark.story_id
-                )
-            )
-        )
-
-        if existing_bookmark:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="You have already bookmarked this story"
             )
 
-        # Create bookmark
-        db_bookmark = Bookmark(
-            user_id=current_user.id,
-            story_id=bookmark.story_id,
-            last_read_chapter=bookmark.last_read_chapter
-        )
-        db.add(db_bookmark)
         await db.commit()
-        await db.refresh(db_bookmark)
-
-        # Get updated bookmarks count
-        bookmarks_count = await db.scalar(
-            select(func.count())
-            .select_from(Bookmark)
-            .filter(Bookmark.story_id == bookmark.story_id)
-        )
 
         return BookmarkResponse(
             id=db_bookmark.id,
@@ -243,15 +235,9 @@ async def create_bookmark(
             story_id=bookmark.story_id,
             last_read_chapter=db_bookmark.last_read_chapter,
             created_at=db_bookmark.created_at,
-            bookmarks_count=bookmarks_count
+            bookmarks_count=db_bookmark.new_count
         )
 
-    except IntegrityError:
-        await db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="You have already bookmarked this story"
-        )
     except HTTPException:
         await db.rollback()
         raise
@@ -278,22 +264,19 @@ async def delete_bookmark(
                 detail="Your account is not active"
             )
 
-        bookmark = await db.scalar(
-            select(Bookmark).filter(
-                and_(
-                    Bookmark.user_id == current_user.id,
-                    Bookmark.story_id == story_id
-                )
-            )
-        )
+        result = await db.execute(_write_and_count(
+            delete(Bookmark)
+            .where(and_(Bookmark.user_id == current_user.id, Bookmark.story_id == story_id))
+            .returning(Bookmark.story_id),
+            'story_id', Story.bookmarks_count, -1
+        ))
 
-        if not bookmark:
+        if result.first() is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Bookmark not found"
             )
 
-        await db.delete(bookmark)
         await db.commit()
 
     except HTTPException:
@@ -307,142 +290,199 @@ async def delete_bookmark(
             detail="Failed to delete bookmark"
         )
 
-    @router.post("/follow", response_model=UserFollowResponse, status_code=status.HTTP_201_CREATED)
-    async def follow_user(
-            follow: UserFollowCreate,
-            current_user: User = Depends(get_current_user),
-            db: AsyncSession = Depends(get_db)
-    ):
-        """Create a new follow relationship with proper validation."""
-        try:
-            if not current_user.is_active:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Your account is not active"
-                )
 
-            # Prevent self-following
-            if follow.followed_id == current_user.id:
-                raise HTTPException(
-                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    detail="You cannot follow yourself"
-                )
+@router.post("/follow", response_model=UserFollowResponse, status_code=status.HTTP_201_CREATED)
+async def follow_user(
+        follow: UserFollowCreate,
+        current_user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Create a new follow relationship with proper validation."""
+    try:
+        if not current_user.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Your account is not active"
+            )
 
-            # Check if target user exists and is active
-            followed_user = await db.scalar(
-                select(User).filter(User.id == follow.followed_id)
+        # Prevent self-following
+        if follow.followed_id == current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="You cannot follow yourself"
             )
 
-            if not followed_user:
+        # Create follow, provided the target user exists and is active;
+        # a duplicate inserts nothing
+        followed_name = (
+            select(User.display_name)
+            .filter(User.id == follow.followed_id)
+            .scalar_subquery()
+        )
+        result = await db.execute(_write_and_count(
+            pg_insert(UserFollow)
+            .from_select(
+                ['follower_id', 'followed_id'],
+                select(literal(current_user.id, UserFollow.follower_id.type), User.id)
+                .filter(and_(User.id == follow.followed_id, User.is_active))
+            )
+            .on_conflict_do_nothing(index_elements=['follower_id', 'followed_id'])
+            .returning(UserFollow.id, UserFollow.followed_id, UserFollow.created_at),
+            'followed_id', User.follower_count, 1
+        ).add_columns(followed_name.label('followed_name')))
+        db_follow = result.first()
+
+        if db_follow is None:
+            followed_active = await db.scalar(_USER_ACTIVE_STMT, {'user_id': follow.followed_id})
+            if followed_active is None:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="User not found"
                 )
-
-            if not followed_user.is_active:
+            if not followed_active:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="This user is not available"
                 )
-
-            # Check existing follow
-            existing_follow = await db.scalar(
-                select(UserFollow).filter(
-                    and_(
-                        UserFollow.follower_id == current_user.id,
-                        UserFollow.followed_id == follow.followed_id
-                    )
-                )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="You are already following this user"
             )
 
-            if existing_follow:
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="You are already following this user"
-                )
+        await db.commit()
 
-            # Create follow
-            db_follow = UserFollow(
-                follower_id=current_user.id,
-                followed_id=follow.followed_id
-            )
-            db.add(db_follow)
-            await db.commit()
-            await db.refresh(db_follow)
-
-            # Get follower count
-            follower_count = await db.scalar(
-                select(func.count())
-                .select_from(UserFollow)
-                .filter(UserFollow.followed_id == follow.followed_id)
-            )
+        return UserFollowResponse(
+            id=db_follow.id,
+            follower_id=current_user.id,
+            followed_id=follow.followed_id,
+            created_at=db_follow.created_at,
+            follower_name=current_user.display_name,
+            followed_name=db_follow.followed_name,
+            follower_count=db_follow.new_count
+        )
 
-            return UserFollowResponse(
-                id=db_follow.id,
-                follower_id=current_user.id,
-                followed_id=follow.followed_id,
-                created_at=db_follow.created_at,
-                follower_name=current_user.pseudonym or current_user.full_name,
-                followed_name=followed_user.pseudonym or followed_user.full_name,
-                follower_count=follower_count
-            )
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error creating follow: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to follow user"
+        )
 
-        except IntegrityError:
-            await db.rollback()
+@router.delete("/unfollow/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def unfollow_user(
+        user_id: int,
+        current_user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Remove a follow relationship with proper validation."""
+    try:
+        if not current_user.is_active:
             raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="You are already following this user"
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Your account is not active"
             )
-        except HTTPException:
-            await db.rollback()
-            raise
-        except Exception as e:
-            await db.rollback()
-            logger.error(f"Error creating follow: {str(e)}")
+
+        result = await db.execute(_write_and_count(
+            delete(UserFollow)
+            .where(and_(UserFollow.follower_id == current_user.id, UserFollow.followed_id == user_id))
+            .returning(UserFollow.followed_id),
+            'followed_id', User.follower_count, -1
+        ))
+
+        if result.first() is None:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to follow user"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Follow relationship not found"
             )
 
-    @router.delete("/unfollow/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-    async def unfollow_user(
-            user_id: int,
-            current_user: User = Depends(get_current_user),
-            db: AsyncSession = Depends(get_db)
-    ):
-        """Remove a follow relationship with proper validation."""
-        try:
-            if not current_user.is_active:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Your account is not active"
-                )
+        await db.commit()
 
-            follow = await db.scalar(
-                select(UserFollow).filter(
-                    and_(
-                        UserFollow.follower_id == current_user.id,
-                        UserFollow.followed_id == user_id
-                    )
-                )
-            )
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error unfollowing user: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to unfollow user"
+        )
 
-            if not follow:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Follow relationship not found"
-                )
 
-            await db.delete(follow)
-            await db.commit()
+Follower = aliased(User)
+Followed = aliased(User)
+
+
+def _follows_query():
+    """
+    Follow rows with both users' display names, selected as plain columns,
+    newest first. Ids grow with creation time, so they double as the page cursor.
+    """
+    return (
+        select(
+            UserFollow.id,
+            UserFollow.follower_id,
+            UserFollow.followed_id,
+            UserFollow.created_at,
+            Follower.display_name.label('follower_name'),
+            Followed.display_name.label('followed_name'),
+            Followed.follower_count
+        )
+        .join(Follower, Follower.id == UserFollow.follower_id)
+        .join(Followed, Followed.id == UserFollow.followed_id)
+        .order_by(UserFollow.id.desc())
+    )
+
 
-        except HTTPException:
-            await db.rollback()
-            raise
-        except Exception as e:
-            await db.rollback()
-            logger.error(f"Error unfollowing user: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to unfollow user"
-            )
\ No newline at end of file
+@router.get("/followers/{user_id}", response_model=List[UserFollowResponse])
+async def get_followers(
+        user_id: int,
+        before: Optional[int] = Query(None, description="Return follows older than the one with this id"),
+        limit: int = Query(50, ge=1, le=100),
+        current_user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(get_read_db)
+):
+    """List the users following a user, newest first."""
+    try:
+        query = _follows_query().filter(UserFollow.followed_id == user_id)
+        if before is not None:
+            query = query.filter(UserFollow.id < before)
+        result = await db.execute(query.limit(limit))
+        # Every field comes straight from typed columns, so skip validation
+        return [UserFollowResponse.model_construct(**row) for row in result.mappings()]
+
+    except Exception as e:
+        logger.error(f"Error listing followers of user {user_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch followers"
+        )
+
+
+@router.get("/following/{user_id}", response_model=List[UserFollowResponse])
+async def get_following(
+        user_id: int,
+        before: Optional[int] = Query(None, description="Return follows older than the one with this id"),
+        limit: int = Query(50, ge=1, le=100),
+        current_user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(get_read_db)
+):
+    """List the users a user follows, newest first."""
+    try:
+        query = _follows_query().filter(UserFollow.follower_id == user_id)
+        if before is not None:
+            query = query.filter(UserFollow.id < before)
+        result = await db.execute(query.limit(limit))
+        # Every field comes straight from typed columns, so skip validation
+        return [UserFollowResponse.model_construct(**row) for row in result.mappings()]
+
+    except Exception as e:
+        logger.error(f"Error listing users followed by user {user_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch following"
+        )
@@ -1,23 +1,84 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
-from sqlalchemy import desc, func, and_, update, distinct
+from sqlalchemy.orm import raiseload
+from sqlalchemy import desc, func, and_, update, delete, insert, literal, literal_column, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from typing import List, Optional
 from datetime import datetime, timedelta
 
 from starlette import status
 
 from app.flood_protection import FloodProtection
-from app.models.social import Bookmark, Like, UserFollow, StoryView
+from app.routes.chapter import response_cache as chapter_cache
+from app.story_columns import AUTHOR_COLUMNS, INTERACTIONS, story_fields, story_response
+from app.view_counter import ViewCounter
+from app.models.social import StoryView
 from app.models.story import Story, Genre
 from app.models.user import User
 from app.schemas.story import StoryCreate, StoryUpdate, StoryResponse, StoryListResponse
+from app.utils.cache import TTLCache
 from app.utils.image_security import ImageSecurityUtils
 from dependencies import get_current_user, get_db, logger
 
 router = APIRouter()
 flood_protection = FloodProtection(max_stories=5, time_window=20)
+view_counter = ViewCounter(flush_interval=2.0)
+
+_STORY_AUTHOR_STMT = select(Story.author_id).filter(Story.id == bindparam('story_id'))
+
+# The ix_stories_search expression; constants are inlined so the planner can match it
+_SEARCH_DOCUMENT = func.to_tsvector(
+    literal_column("'simple'"),
+    func.coalesce(Story.title, literal_column("''"))
+    .op('||')(literal_column("' '"))
+    .op('||')(func.coalesce(Story.summary, literal_column("''")))
+)
+
+
+# Pages of list_stories by filter, without the per-user flags; cleared when a story changes
+story_list_cache = TTLCache(maxsize=256, ttl=30)
+
+
+# The flags of list_stories, for a whole page of story_ids
+_PAGE_FLAGS_STMT = (
+    select(Story.id, *INTERACTIONS)
+    .filter(Story.id.in_(bindparam('story_ids', expanding=True)))
+)
+
+
+# get_story's read, which also records the view: the data-modifying CTE inserts
+# only for an available story, and the unique (story_id, user_id) key skips
+# repeat views
+_NEW_VIEW = (
+    pg_insert(StoryView)
+    .from_select(
+        # viewed_at is given here: Python-side column defaults are not applied
+        # to an INSERT inside a SELECT's WITH clause
+        ['story_id', 'user_id', 'viewed_at'],
+        select(
+            Story.id,
+            bindparam('user_id', type_=StoryView.user_id.type),
+            func.timezone('UTC', func.now())
+        )
+        .join(Story.author)
+        .filter(and_(Story.id == bindparam('story_id'), User.is_active))
+    )
+    .on_conflict_do_nothing(index_elements=['story_id', 'user_id'])
+    .returning(StoryView.id)
+    .cte('new_view')
+)
+_GET_STORY_STMT = (
+    select(
+        Story, *AUTHOR_COLUMNS, User.is_active, *INTERACTIONS,
+        select(_NEW_VIEW.c.id).exists().label('is_new_view')
+    )
+    .join(Story.author)
+    .filter(Story.id == bindparam('story_id'))
+    .options(raiseload('*'))
+)
+
 
 @router.post("/", response_model=StoryResponse, status_code=status.HTTP_201_CREATED)
 async def create_story(
@@ -34,8 +95,8 @@ async def create_story(
                 detail="Your account is not active"
             )
 
-        # Check flood protection
-        await flood_protection.check_rate_limit(current_user.id, db)
+        # Check flood protection (local pre-check, the insert below enforces the limit)
+        flood_protection.check_rate_limit(current_user.id)
 
         story_data = story.dict()
 
@@ -63,23 +124,35 @@ async def create_story(
                     detail="Invalid image format or size"
                 )
 
-        # Create story
-        db_story = Story(**story_data, author_id=current_user.id)
-        db.add(db_story)
+        await flood_protection.lock(current_user.id, db)
+
+        # Create story, unless the user has hit the flood limit in the meantime
+        values = {**story_data, 'author_id': current_user.id}
+        result = await db.execute(
+            insert(Story)
+            .from_select(
+                list(values),
+                select(*[literal(value, Story.__table__.c[key].type) for key, value in values.items()])
+                .where(flood_protection.within_limit(current_user.id))
+            )
+            .returning(*Story.__table__.c)
+        )
+        db_story = result.mappings().one_or_none()
+        if db_story is None:
+            await flood_protection.raise_rate_limited(current_user.id, db)
         await db.commit()
-        await db.refresh(db_story)
+        story_list_cache.clear()
+        flood_protection.record(current_user.id)
 
         return StoryResponse(
-            **db_story.__dict__,
-            author_name=current_user.pseudonym or current_user.full_name,
+            **db_story,
+            author_name=current_user.display_name,
             author_avatar_url=current_user.avatar_url,
-            likes_count=0,
-            bookmarks_count=0,
             is_liked=False,
             is_bookmarked=False,
             is_following_author=False,
             is_my_story=True,
-            follower_count=0
+            follower_count=current_user.follower_count
         )
 
     except HTTPException:
@@ -125,25 +198,20 @@ async def list_stories(
             )
 
         # Build query
-        query = select(Story).options(
-            joinedload(Story.author),
-            joinedload(Story.likes),
-            joinedload(Story.bookmarks)
-        ).filter(Story.author.has(is_active=True))  # Only stories from active users
+        query = (
+            select(Story, *AUTHOR_COLUMNS)
+            .join(Story.author)
+            .filter(User.is_active)  # Only stories from active users
+            .options(raiseload('*'))
+        )
 
         if genre:
             query = query.filter(Story.genre == genre)
         if search:
-            search_term = f"%{search}%"
             query = query.filter(
-                Story.title.ilike(search_term) |
-                Story.summary.ilike(search_term)
+                _SEARCH_DOCUMENT.op('@@')(func.plainto_tsquery(literal_column("'simple'"), search))
             )
 
-        # Get total count
-        total_query = select(func.count()).select_from(query.subquery())
-        total = await db.scalar(total_query)
-
         # Apply sorting and pagination
         if sort_by not in ["rating", "views", "created_at"]:
             raise HTTPException(
@@ -151,52 +219,54 @@ async def list_stories(
                 detail="Invalid sort parameter"
             )
 
-        query = query.order_by(desc(getattr(Story, sort_by)))
-        query = query.offset(skip).limit(limit)
-
-        result = await db.execute(query)
-        stories = result.unique().scalars().all()
+        key = (skip, limit, genre, search, sort_by)
+        cached = story_list_cache.get(key)
+        if cached is None:
+            # The total comes with every row, so the filters run once per page
+            page_query = query.add_columns(func.count().over().label('total'))
+            page_query = page_query.order_by(desc(getattr(Story, sort_by)))
+            page_query = page_query.offset(skip).limit(limit)
+
+            result = await db.execute(page_query)
+            rows = result.all()
+
+            if rows:
+                total = rows[0].total
+            elif skip:
+                # Past the last page there's no row to read the total from
+                total = await db.scalar(select(func.count()).select_from(query.subquery()))
+            else:
+                total = 0
+
+            cached = (total, [story_fields(row) for row in rows])
+            story_list_cache.set(key, cached)
+        total, stories = cached
+
+        # The user's own flags aren't cached; one query covers the whole page
+        flags = {}
+        if stories:
+            result = await db.execute(
+                _PAGE_FLAGS_STMT,
+                {'user_id': current_user.id, 'story_ids': [story['id'] for story in stories]}
+            )
+            flags = {row.id: row for row in result}
 
-        # Process stories and return response
+        # The fields come straight from the columns, so the page is returned as
+        # is; response_model only documents it and is not validated against
         story_responses = []
         for story in stories:
-            is_liked = any(like.user_id == current_user.id for like in story.likes)
-            is_bookmarked = any(bookmark.user_id == current_user.id for bookmark in story.bookmarks)
-            is_following = await db.scalar(
-                select(UserFollow)
-                .filter(
-                    and_(
-                        UserFollow.follower_id == current_user.id,
-                        UserFollow.followed_id == story.author_id
-                    )
-                )
-            )
+            story_flags = flags.get(story['id'])
+            if story_flags is None:
+                continue  # deleted since the page was cached
 
-            story_responses.append(
-                StoryResponse(
-                    **story.__dict__,
-                    author_name=story.author.pseudonym or story.author.full_name,
-                    author_avatar_url=story.author.avatar_url,
-                    likes_count=len(story.likes),
-                    bookmarks_count=len(story.bookmarks),
-                    is_liked=is_liked,
-                    is_bookmarked=is_bookmarked,
-                    is_following_author=bool(is_following),
-                    is_my_story=story.author_id == current_user.id,
-                    follower_count=await db.scalar(
-                        select(func.count())
-                        .select_from(UserFollow)
-                        .filter(UserFollow.followed_id == story.author_id)
-                    )
-                )
-            )
+            story_responses.append(story_response(story, story_flags, current_user.id))
 
-        return StoryListResponse(
-            stories=story_responses,
-            total=total,
-            page=skip // limit + 1,
-            per_page=limit
-        )
+        return ORJSONResponse({
+            'stories': story_responses,
+            'total': total,
+            'page': skip // limit + 1,
+            'per_page': limit
+        })
 
     except HTTPException:
         raise
@@ -215,78 +285,32 @@ async def get_story(
 ):
     """Get a single story by ID with view tracking."""
     try:
-        # Fetch story with related data
-        query = select(Story).options(
-            joinedload(Story.author),
-            joinedload(Story.likes),
-            joinedload(Story.bookmarks)
-        ).filter(Story.id == story_id)
-
-        result = await db.execute(query)
-        story = result.unique().scalar_one_or_none()
+        # Fetch story with related data, recording the view
+        result = await db.execute(
+            _GET_STORY_STMT, {'story_id': story_id, 'user_id': current_user.id}
+        )
+        row = result.first()
 
-        if not story:
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Story not found"
             )
 
-        if not story.author.is_active:
+        if not row.is_active:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="This story is not available"
             )
 
-        # Track view if not already viewed
-        existing_view = await db.scalar(
-            select(StoryView).filter(
-                and_(
-                    StoryView.story_id == story_id,
-                    StoryView.user_id == current_user.id
-                )
-            )
-        )
-
-        if not existing_view:
-            new_view = StoryView(
-                story_id=story_id,
-                user_id=current_user.id
-            )
-            story.views += 1
-            db.add(new_view)
+        fields = story_fields(row)
+        if row.is_new_view:
             await db.commit()
-            await db.refresh(story)
-
-        # Get user interactions
-        is_liked = any(like.user_id == current_user.id for like in story.likes)
-        is_bookmarked = any(bookmark.user_id == current_user.id for bookmark in story.bookmarks)
-        is_following = await db.scalar(
-            select(UserFollow).filter(
-                and_(
-                    UserFollow.follower_id == current_user.id,
-                    UserFollow.followed_id == story.author_id
-                )
-            )
-        )
+            # The counter itself is written in batches; count the view here already
+            view_counter.record(story_id)
+            fields['views'] += 1
 
-        follower_count = await db.scalar(
-            select(func.count())
-            .select_from(UserFollow)
-            .filter(UserFollow.followed_id == story.author_id)
-        )
-
-        return StoryResponse(
-            **story.__dict__,
-            author_name=story.author.pseudonym or story.author.full_name,
-            author_avatar_url=story.author.avatar_url,
-            likes_count=len(story.likes),
-            bookmarks_count=len(story.bookmarks),
-            is_liked=is_liked,
-            is_bookmarked=is_bookmarked,
-            is_following_author=bool(is_following),
-            is_my_story=story.author_id == current_user.id,
-            follower_count=follower_count
-        )
+        return StoryResponse(**story_response(fields, row, current_user.id))
 
     except HTTPException:
         raise
@@ -313,22 +337,17 @@ async def update_story(
                 detail="Your account is not active"
             )
 
-        # Fetch story with related data
-        query = select(Story).options(
-            joinedload(Story.likes),
-            joinedload(Story.bookmarks)
-        ).filter(Story.id == story_id)
-        result = await db.execute(query)
-        story = result.unique().scalar_one_or_none()
+        # Only the author is needed for the checks; the full row is read after the update
+        author_id = await db.scalar(_STORY_AUTHOR_STMT, {'story_id': story_id})
 
-        if not story:
+        if author_id is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Story not found"
             )
 
         # Check ownership
-        if story.author_id != current_user.id:
+        if author_id != current_user.id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You can only update your own stories"
@@ -361,42 +380,26 @@ async def update_story(
                     detail="Invalid image format or size"
                 )
 
-        # Update story
-        await db.execute(
+        # Update story and read it back in the same statement
+        result = await db.execute(
             update(Story)
             .where(Story.id == story_id)
             .values(**update_data)
+            .returning(*Story.__table__.c)
         )
+        story = result.mappings().one()
         await db.commit()
-
-        # Fetch updated story with counts
-        result = await db.execute(
-            select(
-                Story,
-                func.count(distinct(Like.id)).label('likes_count'),
-                func.count(distinct(Bookmark.id)).label('bookmarks_count'),
-                func.count(distinct(UserFollow.id)).label('follower_count')
-            )
-            .outerjoin(Like, Like.story_id == Story.id)
-            .outerjoin(Bookmark, Bookmark.story_id == Story.id)
-            .outerjoin(UserFollow, UserFollow.followed_id == Story.author_id)
-            .where(Story.id == story_id)
-            .group_by(Story.id)
-        )
-
-        story, likes_count, bookmarks_count, follower_count = result.first()
+        story_list_cache.clear()
 
         return StoryResponse(
-            **story.__dict__,
-            author_name=current_user.pseudonym or current_user.full_name,
+            **story,
+            author_name=current_user.display_name,
             author_avatar_url=current_user.avatar_url,
-            likes_count=likes_count,
-            bookmarks_count=bookmarks_count,
             is_liked=False,
             is_bookmarked=False,
             is_following_author=False,
             is_my_story=True,
-            follower_count=follower_count
+            follower_count=current_user.follower_count
         )
 
     except HTTPException:
@@ -425,27 +428,30 @@ async def delete_story(
                 detail="Your account is not active"
             )
 
-        # Fetch story
-        query = select(Story).filter(Story.id == story_id)
-        result = await db.execute(query)
-        story = result.scalar_one_or_none()
-
-        if not story:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Story not found"
-            )
+        # Delete story; the database cascades to its chapters, likes, bookmarks and views
+        deleted = await db.scalar(
+            delete(Story)
+            .where(and_(Story.id == story_id, Story.author_id == current_user.id))
+            .returning(Story.id)
+        )
 
-        # Check ownership
-        if story.author_id != current_user.id:
+        if deleted is None:
+            author_id = await db.scalar(_STORY_AUTHOR_STMT, {'story_id': story_id})
+            if author_id is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Story not found"
+                )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You can only delete your own stories"
             )
 
-        # Delete story and related data (cascade should handle relations)
-        await db.delete(story)
         await db.commit()
+        story_list_cache.clear()
+        # The cascade took the chapters too; their ids aren't known here, and
+        # deleting a story is rare enough to start the chapter cache over
+        chapter_cache.clear()
 
     except HTTPException:
         await db.rollback()
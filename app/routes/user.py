@@ -1,20 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
-from sqlalchemy import func, and_
+from sqlalchemy.orm import raiseload
+from sqlalchemy import func, and_, exists, insert, update
 from typing import List
-import asyncio
 
 from starlette import status
 
 from app.models.user import User
 from app.models.story import Story
-from app.models.social import UserFollow, Like, Bookmark
+from app.models.social import UserFollow, Bookmark
 from app.schemas.user import UserCreate, UserUpdate, UserInDB, UserProfile, Token
 from app.schemas.story import StoryResponse
+from app.story_columns import AUTHOR_COLUMNS, INTERACTIONS, story_fields, story_response
 from app.utils.image_security import ImageSecurityUtils
-from app.utils.security import get_password_hash, create_access_token, verify_url
+from app.utils.security import get_password_hash, create_access_token, verify_url, user_cache
 from dependencies import get_db, get_current_user, logger
 
 router = APIRouter()
@@ -69,13 +70,18 @@ async def update_user_me(
                     detail="Pseudonym must not exceed 30 characters"
                 )
 
-        # Update user fields
-        for field, value in update_data.items():
-            setattr(current_user, field, value)
+        # Update user fields; RETURNING brings back updated_at with the same statement
+        result = await db.execute(
+            update(User)
+            .where(User.id == current_user.id)
+            .values(**update_data)
+            .returning(User)
+        )
+        db_user = result.scalar_one()
 
         await db.commit()
-        await db.refresh(current_user)
-        return current_user
+        user_cache.delete(current_user.vk_id)
+        return db_user
 
     except ValueError as ve:
         # Handle Pydantic validation errors
@@ -124,17 +130,17 @@ async def register_user(
                 raise
 
         # Create new user
-        db_user = User(
-            vk_id=user_data['vk_id'],
-            full_name=user_data['full_name'],
-            pseudonym=user_data.get('pseudonym'),
-            bio=user_data.get('bio'),
-            avatar_url=user_data.get('avatar_url'),
-            role=user_data.get('role', 'AUTHOR')
+        await db.execute(
+            insert(User).values(
+                vk_id=user_data['vk_id'],
+                full_name=user_data['full_name'],
+                pseudonym=user_data.get('pseudonym'),
+                bio=user_data.get('bio'),
+                avatar_url=user_data.get('avatar_url'),
+                role=user_data.get('role', 'AUTHOR')
+            )
         )
-        db.add(db_user)
         await db.commit()
-        await db.refresh(db_user)
 
         # Generate access token
         access_token = create_access_token(data={"sub": str(user.vk_id)})
@@ -155,35 +161,28 @@ async def get_user_profile(
 ):
     """Get user profile with statistics."""
     try:
-        # Fetch user with related counts
-        user = await db.scalar(select(User).filter(User.id == user_id))
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Execute count queries in parallel
-        counts_queries = await asyncio.gather(
-            db.scalar(
-                select(func.count())
-                .where(UserFollow.followed_id == user_id)
-            ),
-            db.scalar(
+        # Fetch user with related counts in one statement
+        result = await db.execute(
+            select(
+                User,
                 select(func.count())
                 .where(UserFollow.follower_id == user_id)
-            ),
-            db.scalar(
+                .scalar_subquery(),
                 select(func.count())
                 .where(Story.author_id == user_id)
-            ),
-            db.scalar(
-                select(func.count())
-                .where(and_(
+                .scalar_subquery(),
+                exists().where(and_(
                     UserFollow.follower_id == current_user.id,
                     UserFollow.followed_id == user_id
                 ))
             )
+            .filter(User.id == user_id)
         )
+        row = result.first()
+        if not row:
+            raise HTTPException(status_code=404, detail="User not found")
 
-        followers_count, following_count, stories_count, is_following = counts_queries
+        user, following_count, stories_count, is_following = row
 
         return UserProfile(
             id=user.id,
@@ -196,10 +195,10 @@ async def get_user_profile(
             is_active=user.is_active,
             created_at=user.created_at,
             updated_at=user.updated_at,
-            followers_count=followers_count,
+            followers_count=user.follower_count,
             following_count=following_count,
             stories_count=stories_count,
-            is_following=bool(is_following),
+            is_following=is_following,
             is_self=user.id == current_user.id
         )
 
@@ -216,83 +215,25 @@ async def get_bookmarked_stories(
 ):
     """Get user's bookmarked stories with optimized queries."""
     try:
-        # Fetch bookmarked stories with related data
+        # Fetch bookmarked stories together with the author and the user's own flags
         query = (
-            select(Story)
+            select(Story, *AUTHOR_COLUMNS, *INTERACTIONS)
             .join(Bookmark, and_(
                 Story.id == Bookmark.story_id,
                 Bookmark.user_id == current_user.id
             ))
-            .options(
-                joinedload(Story.author),
-                joinedload(Story.likes),
-                joinedload(Story.bookmarks)
-            )
+            .join(User, User.id == Story.author_id)
             .order_by(Story.updated_at.desc())
+            .options(raiseload('*'))
         )
 
-        result = await db.execute(query)
-        stories = result.unique().scalars().all()
-
-        if not stories:
-            return []
+        result = await db.execute(query, {'user_id': current_user.id})
 
-        # Gather IDs for batch queries
-        story_ids = [story.id for story in stories]
-        author_ids = {story.author_id for story in stories}
-
-        # Execute all additional queries in parallel
-        likes_query = select(Like.story_id).filter(
-            and_(
-                Like.user_id == current_user.id,
-                Like.story_id.in_(story_ids)
-            )
-        )
-
-        follows_query = select(UserFollow.followed_id).filter(
-            and_(
-                UserFollow.follower_id == current_user.id,
-                UserFollow.followed_id.in_(author_ids)
-            )
-        )
-
-        follower_counts_query = (
-            select(
-                UserFollow.followed_id,
-                func.count(UserFollow.follower_id).label('count')
-            )
-            .filter(UserFollow.followed_id.in_(author_ids))
-            .group_by(UserFollow.followed_id)
-        )
-
-        # Execute queries concurrently
-        likes_result, follows_result, follower_counts_result = await asyncio.gather(
-            db.execute(likes_query),
-            db.execute(follows_query),
-            db.execute(follower_counts_query)
-        )
-
-        # Process results
-        user_likes = {like[0] for like in likes_result.fetchall()}
-        user_follows = {follow[0] for follow in follows_result.fetchall()}
-        follower_counts = dict(follower_counts_result.fetchall())
-
-        # Construct response
-        return [
-            StoryResponse(
-                **story.__dict__,
-                author_name=story.author.pseudonym or story.author.full_name,
-                author_avatar_url=story.author.avatar_url,
-                likes_count=len(story.likes),
-                bookmarks_count=len(story.bookmarks),
-                is_liked=story.id in user_likes,
-                is_bookmarked=True,  # Always true for bookmarked stories
-                is_following_author=story.author_id in user_follows,
-                is_my_story=story.author_id == current_user.id,
-                follower_count=follower_counts.get(story.author_id, 0)
-            )
-            for story in stories
-        ]
+        # Built from the columns as they are; response_model only documents it
+        return ORJSONResponse([
+            story_response(story_fields(row), row, current_user.id)
+            for row in result
+        ])
 
     except Exception as e:
         logger.error(f"Error in get_bookmarked_stories: {str(e)}")
@@ -2,8 +2,8 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
-from sqlalchemy import desc
+from sqlalchemy.orm import raiseload
+from sqlalchemy import desc, bindparam
 from typing import List
 
 from starlette import status
@@ -11,42 +11,46 @@ from starlette import status
 from app.models.story import Story
 from app.models.user import User
 from app.schemas.usercontent import UserStoryResponse
-from dependencies import get_current_user, get_db
+from dependencies import get_current_user, get_read_db
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+_USER_ACTIVE_STMT = select(User.is_active).filter(User.id == bindparam('user_id'))
+
 @router.get("/users/{user_id}/stories", response_model=List[UserStoryResponse])
 async def get_user_stories(
     user_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get stories for a specific user."""
     logger.info(f"Fetching stories for user_id: {user_id}")
     try:
         # Verify user exists
-        user = await db.get(User, user_id)
-        if not user:
+        is_active = await db.scalar(_USER_ACTIVE_STMT, {'user_id': user_id})
+        if is_active is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
 
-        if not user.is_active:
+        if not is_active:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="This user's content is not available"
             )
 
         # Fetch stories
-        query = select(Story).options(
-            joinedload(Story.likes),
-            joinedload(Story.bookmarks)
-        ).filter(Story.author_id == user_id).order_by(desc(Story.created_at))
+        query = (
+            select(Story)
+            .filter(Story.author_id == user_id)
+            .order_by(desc(Story.created_at))
+            .options(raiseload('*'))
+        )
 
         result = await db.execute(query)
-        stories = result.unique().scalars().all()
+        stories = result.scalars().all()
 
         user_stories = []
         for story in stories:
@@ -59,8 +63,8 @@ async def get_user_stories(
                     cover_image_url=story.cover_image_url or '',
                     created_at=story.created_at,
                     updated_at=story.updated_at,
-                    likes_count=len(story.likes),
-                    bookmarks_count=len(story.bookmarks),
+                    likes_count=story.likes_count,
+                    bookmarks_count=story.bookmarks_count,
                     views=story.views,
                     rating=float(story.rating) if story.rating is not None else 0.0
                 )
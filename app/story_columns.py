@@ -0,0 +1,56 @@
+from sqlalchemy import and_, exists, bindparam
+from app.models.social import Bookmark, Like, UserFollow
+from app.models.story import Story
+from app.models.user import User
+
+# The author fields a StoryResponse shows, selected next to the story through
+# a join rather than by loading the whole User row
+AUTHOR_COLUMNS = (
+    User.display_name.label('author_name'),
+    User.avatar_url.label('author_avatar_url'),
+    User.follower_count,
+)
+
+# Whether the user (bound as user_id) has liked and bookmarked the story and
+# follows its author, as columns to select next to it; only stories is
+# correlated, so they also work in queries that join these tables
+INTERACTIONS = (
+    exists().where(and_(
+        Like.story_id == Story.id, Like.user_id == bindparam('user_id')
+    )).correlate(Story).label('is_liked'),
+    exists().where(and_(
+        Bookmark.story_id == Story.id, Bookmark.user_id == bindparam('user_id')
+    )).correlate(Story).label('is_bookmarked'),
+    exists().where(and_(
+        UserFollow.followed_id == Story.author_id, UserFollow.follower_id == bindparam('user_id')
+    )).correlate(Story).label('is_following_author'),
+)
+
+
+def story_fields(row) -> dict:
+    """The part of a StoryResponse that is the same for every user, from a row with AUTHOR_COLUMNS."""
+    fields = {column.key: getattr(row.Story, column.key) for column in Story.__table__.columns}
+    fields.update(
+        author_name=row.author_name,
+        author_avatar_url=row.author_avatar_url,
+        follower_count=row.follower_count
+    )
+    return fields
+
+
+def story_response(fields: dict, flags, user_id: int) -> dict:
+    """
+    The StoryResponse fields of a story as seen by the user.
+
+    Args:
+        fields: Result of story_fields
+        flags: Row with the INTERACTIONS columns
+        user_id: ID of the user viewing the story
+    """
+    return {
+        **fields,
+        'is_liked': flags.is_liked,
+        'is_bookmarked': flags.is_bookmarked,
+        'is_following_author': flags.is_following_author,
+        'is_my_story': fields['author_id'] == user_id
+    }
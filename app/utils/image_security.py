@@ -8,6 +8,7 @@ from botocore.config import Config
 from urllib.parse import urlparse
 from typing import Optional
 from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
 import io
 from PIL import Image
 from datetime import datetime
@@ -145,30 +146,47 @@ class ImageSecurityUtils:
             logger.error(f"Data URL validation error: {str(e)}")
             return False
 
+    @staticmethod
+    def _optimize_image(image_data: bytes) -> bytes:
+        """Re-encode the image as JPEG, flattening any transparency onto white."""
+        with Image.open(io.BytesIO(image_data)) as img:
+            output = io.BytesIO()
+            if img.mode in ('RGBA', 'LA'):
+                background = Image.new('RGB', img.size, (255, 255, 255))
+                background.paste(img, mask=img.split()[-1])
+                img = background
+
+            img.save(output, format='JPEG', quality=85, optimize=True)
+            return output.getvalue()
+
+    @classmethod
+    def _download_image(cls, url: str) -> bytes:
+        """Download an image, refusing ones that announce a size over the limit."""
+        response = requests.get(url, timeout=10, stream=True)
+        response.raise_for_status()
+
+        # Check file size
+        content_length = response.headers.get('content-length')
+        if content_length and int(content_length) > cls.MAX_FILE_SIZE:
+            raise HTTPException(status_code=400, detail="Image too large")
+
+        return response.content
+
     @classmethod
     async def process_and_upload_image(cls, image_data: bytes, mime_type: str) -> str:
         """Process image data and upload to Yandex Cloud S3."""
         try:
-            # Validate image using PIL
-            with Image.open(io.BytesIO(image_data)) as img:
-                # Check dimensions
-
-                # Optimize image
-                output = io.BytesIO()
-                if img.mode in ('RGBA', 'LA'):
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    background.paste(img, mask=img.split()[-1])
-                    img = background
-
-                img.save(output, format='JPEG', quality=85, optimize=True)
-                image_data = output.getvalue()
+            # PIL, boto3 and requests block, so they run in the threadpool
+            # rather than stalling every other request on the event loop
+            image_data = await run_in_threadpool(cls._optimize_image, image_data)
 
             # Generate filename and upload to S3
             filename = cls._generate_unique_filename()
             s3_client = cls._get_s3_client()
 
             try:
-                s3_client.put_object(
+                await run_in_threadpool(
+                    s3_client.put_object,
                     Bucket='readroom',
                     Key=filename,
                     Body=image_data,
@@ -208,15 +226,7 @@ class ImageSecurityUtils:
 
                 # Download image
                 try:
-                    response = requests.get(image_source, timeout=10, stream=True)
-                    response.raise_for_status()
-
-                    # Check file size
-                    content_length = response.headers.get('content-length')
-                    if content_length and int(content_length) > cls.MAX_FILE_SIZE:
-                        raise HTTPException(status_code=400, detail="Image too large")
-
-                    image_data = response.content
+                    image_data = await run_in_threadpool(cls._download_image, image_source)
                     mime_type = magic.from_buffer(image_data, mime=True)
                 except requests.exceptions.RequestException as e:
                     logger.error(f"Failed to download image: {str(e)}")
@@ -16,6 +16,7 @@ from sqlalchemy.future import select
 
 from app.models.user import User
 from app.schemas.user import TokenData
+from app.utils.cache import TTLCache
 from database import get_db
 from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, CLIENT_SECRET
 
@@ -23,6 +24,8 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# Column values of recently authenticated users by vk_id, so most requests skip the lookup
+user_cache = TTLCache(maxsize=4096, ttl=30)
 
 def is_valid(*, query: dict, secret: str) -> bool:
     """Check VK Apps signature"""
@@ -87,10 +90,16 @@ def decode_access_token(token: str):
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     token_data = decode_access_token(token)
-    user = await db.scalar(select(User).filter(User.vk_id == token_data.vk_id))
-    if user is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    values = user_cache.get(token_data.vk_id)
+    if values is None:
+        result = await db.execute(select(*User.__table__.c).filter(User.vk_id == token_data.vk_id))
+        row = result.mappings().first()
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        values = dict(row)
+        user_cache.set(token_data.vk_id, values)
+    # A new instance outside any session each time, so requests never share state
+    return User(**values)
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
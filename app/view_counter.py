@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Optional
+from sqlalchemy import update, bindparam
+from app.models.story import Story
+from database import async_session
+
+logger = logging.getLogger(__name__)
+
+_stories = Story.__table__
+
+# One parameter set per story; updated_at is kept, a view is not an edit
+_ADD_VIEWS_STMT = (
+    update(_stories)
+    .where(_stories.c.id == bindparam('story_id'))
+    .values(views=_stories.c.views + bindparam('delta'), updated_at=_stories.c.updated_at)
+)
+
+
+class ViewCounter:
+    """Buffers story view increments and writes them in batches."""
+
+    def __init__(self, flush_interval: float = 2.0, max_retry_delay: float = 60.0):
+        """
+        Initialize the view counter.
+
+        Args:
+            flush_interval: Seconds between the first buffered view and the write
+            max_retry_delay: Longest wait between retries of a failed write
+        """
+        self.flush_interval = flush_interval
+        self.max_retry_delay = max_retry_delay
+        self._retry_delay = flush_interval
+        self._pending: Counter = Counter()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, story_id: int) -> None:
+        """Count a view of the story; it is written with the next flush."""
+        self._pending[story_id] += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_later(self.flush_interval))
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write all buffered views with a single executemany UPDATE."""
+        pending, self._pending = self._pending, Counter()
+        if not pending:
+            return
+
+        try:
+            async with async_session() as db:
+                await db.execute(
+                    _ADD_VIEWS_STMT,
+                    [{'story_id': story_id, 'delta': delta} for story_id, delta in pending.items()]
+                )
+                await db.commit()
+        except Exception as e:
+            # Keep the views and retry on our own, backing off while the
+            # database stays unavailable, rather than waiting for another view
+            self._retry_delay = min(self._retry_delay * 2, self.max_retry_delay)
+            logger.error("Error writing story views, retrying in %.1fs: %s", self._retry_delay, e)
+            self._pending.update(pending)
+            self._task = asyncio.create_task(self._flush_later(self._retry_delay))
+        else:
+            self._retry_delay = self.flush_interval
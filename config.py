@@ -6,6 +6,14 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional read replica for endpoints that only read; falls back to DATABASE_URL
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+# Set when DATABASE_URL points at PgBouncer in transaction pooling mode
+DATABASE_PGBOUNCER = os.getenv("DATABASE_PGBOUNCER", "").lower() in ("1", "true", "yes")
+# Connections each worker keeps open; keep workers x (pool size + overflow) within
+# the server's max_connections, or PgBouncer's max_client_conn when behind it
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "20"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
 ACCESS_TOKEN_EXPIRE_MINUTES = os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")
 CLIENT_SECRET = os.getenv("CLIENT_SECRET")
 
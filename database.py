@@ -1,26 +1,167 @@
-from sqlalchemy import inspect
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import declarative_base, sessionmaker
-from config import DATABASE_URL
+import asyncio
+from fastapi import Depends
+from sqlalchemy import Column, DateTime, String, Table, func, insert, inspect, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import declarative_base
+from uuid import uuid4
+from config import DATABASE_URL, DATABASE_READ_URL, DATABASE_PGBOUNCER, DATABASE_POOL_SIZE, DATABASE_MAX_OVERFLOW
 
-engine = create_async_engine(DATABASE_URL)
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+# Statements asyncpg keeps prepared per connection; the default of 100 is
+# smaller than the number of distinct statements the routes issue
+connect_args = {"prepared_statement_cache_size": 500}
+if DATABASE_PGBOUNCER:
+    # A transaction pooler hands each transaction to any server connection, so
+    # asyncpg must not rely on statements prepared earlier on "its" connection
+    connect_args = {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+
+def _create_engine(url):
+    # pre_ping and recycle drop connections the server or a firewall closed
+    # while idle; the short pool_timeout turns pool exhaustion into a quick
+    # error instead of requests queueing behind each other for 30 seconds
+    return create_async_engine(
+        url,
+        pool_size=DATABASE_POOL_SIZE,
+        max_overflow=DATABASE_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        pool_timeout=5,
+        connect_args=connect_args,
+    )
+
+engine = _create_engine(DATABASE_URL)
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+# Read-only endpoints use the replica when one is configured. It may lag
+# slightly behind, so anything that writes, must see its own writes, or fills
+# an in-process cache (which would keep a lagging read after invalidation) uses get_db
+read_engine = _create_engine(DATABASE_READ_URL) if DATABASE_READ_URL else engine
+read_session = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
 
+# Names of the SCHEMA_UPGRADES steps a database already has
+schema_upgrades = Table(
+    "schema_upgrades",
+    Base.metadata,
+    Column("name", String, primary_key=True),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+# Taken by whoever applies upgrades, so workers starting together don't race
+SCHEMA_LOCK_ID = 720514
+
+# Changes for databases created before a model change, as named steps. Each step
+# runs once and is then recorded in schema_upgrades, so the ALTER TABLEs and
+# their locks are not repeated on every start. Append new steps; never edit
+# one that has shipped.
+SCHEMA_UPGRADES = [
+    ("stories_indexes", [
+        "CREATE INDEX IF NOT EXISTS ix_stories_author_created ON stories (author_id, created_at DESC)",
+        "CREATE INDEX IF NOT EXISTS ix_stories_genre ON stories (genre)",
+    ]),
+    ("chapters_author_id", [
+        "ALTER TABLE chapters ADD COLUMN IF NOT EXISTS author_id INTEGER REFERENCES users (id) ON DELETE CASCADE",
+        "UPDATE chapters SET author_id = stories.author_id FROM stories "
+        "WHERE stories.id = chapters.story_id AND chapters.author_id IS NULL",
+        "ALTER TABLE chapters ALTER COLUMN author_id SET NOT NULL",
+        "DROP INDEX IF EXISTS ix_chapters_story_created",
+        "CREATE INDEX IF NOT EXISTS ix_chapters_author_created ON chapters (author_id, created_at DESC)",
+    ]),
+    ("drop_redundant_indexes", [
+        "DROP INDEX IF EXISTS ix_likes_id",
+        "DROP INDEX IF EXISTS ix_user_follows_id",
+        "DROP INDEX IF EXISTS ix_story_views_id",
+        "DROP INDEX IF EXISTS ix_users_id",
+        "DROP INDEX IF EXISTS ix_stories_id",
+        "DROP INDEX IF EXISTS ix_stories_title",
+        "DROP INDEX IF EXISTS ix_chapters_id",
+        "DROP INDEX IF EXISTS ix_chapters_title",
+    ]),
+    ("user_follows_indexes", [
+        "DROP INDEX IF EXISTS ix_user_follows_followed_follower",
+        "CREATE INDEX IF NOT EXISTS ix_user_follows_followed_id ON user_follows (followed_id, id DESC)",
+        "CREATE INDEX IF NOT EXISTS ix_user_follows_follower_id ON user_follows (follower_id, id DESC)",
+    ]),
+    ("stories_search_index", [
+        "CREATE INDEX IF NOT EXISTS ix_stories_search ON stories "
+        "USING GIN (to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(summary, '')))",
+    ]),
+    ("social_counters", [
+        "ALTER TABLE stories ADD COLUMN IF NOT EXISTS likes_count INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE stories ADD COLUMN IF NOT EXISTS bookmarks_count INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS follower_count INTEGER NOT NULL DEFAULT 0",
+    ]),
+    ("users_display_name", [
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS display_name VARCHAR(30) "
+        "GENERATED ALWAYS AS (coalesce(nullif(pseudonym, ''), full_name)) STORED",
+    ]),
+]
+
 async def create_tables():
     async with engine.begin() as conn:
         await conn.run_sync(check_and_create_tables)
 
+def apply_upgrades(conn, steps):
+    """
+    Run the steps the database doesn't have yet and record them, holding the schema lock.
+
+    Returns:
+        list: Names of the steps that were applied
+    """
+    conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({SCHEMA_LOCK_ID})")
+    schema_upgrades.create(bind=conn, checkfirst=True)
+    applied = set(conn.scalars(select(schema_upgrades.c.name)))
+
+    new = []
+    for name, statements in steps:
+        if name in applied:
+            continue
+        for statement in statements:
+            conn.exec_driver_sql(statement)
+        conn.execute(insert(schema_upgrades).values(name=name))
+        new.append(name)
+    return new
+
 def check_and_create_tables(conn):
+    conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({SCHEMA_LOCK_ID})")
     inspector = inspect(conn)
     existing_tables = inspector.get_table_names()
 
     if not existing_tables:
         Base.metadata.create_all(bind=conn)
+        # The models already include every upgrade
+        conn.execute(insert(schema_upgrades), [{"name": name} for name, _ in SCHEMA_UPGRADES])
     else:
         print("Tables already exist. Skipping table creation.")
+        apply_upgrades(conn, SCHEMA_UPGRADES)
+
+async def warm_pool():
+    """Open the pools' connections up front so early requests don't wait on connecting."""
+    async def ping(pool_engine):
+        async with pool_engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+
+    # Checked out concurrently, so each ping gets its own connection
+    engines = {engine, read_engine}
+    await asyncio.gather(*(ping(e) for e in engines for _ in range(e.pool.size())))
 
 async def get_db():
     async with async_session() as db:
-        yield db
\ No newline at end of file
+        yield db
+
+async def get_read_db(db: AsyncSession = Depends(get_db)):
+    if read_engine is engine:
+        # No replica: reuse the request's session, and the connection the user
+        # lookup may already hold, rather than taking a second one from the pool
+        yield db
+        return
+
+    # Declared after the current user, so the lookup is done by now; hand its
+    # connection back before taking one from the replica's pool
+    await db.close()
+    async with read_session() as read_db:
+        yield read_db
\ No newline at end of file
@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils.security import get_current_user
 from app.utils.exceptions import CREDENTIALS_EXCEPTION, USER_NOT_FOUND_EXCEPTION
 from app.models.user import User
-from database import get_db
+from database import get_db, get_read_db
 
 logger = logging.getLogger(__name__)
 
@@ -1,12 +1,13 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from starlette import status
 from starlette.responses import JSONResponse
 
 from app.routes import auth, user, story, chapter, social, usercontent, content_block
-from database import create_tables
+from database import create_tables, warm_pool
 
-app = FastAPI(title="ReadRoom API")
+app = FastAPI(title="ReadRoom API", default_response_class=ORJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -15,6 +16,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-After"],
 )
 # Подключаем роуты
 app.include_router(auth.router, tags=["Authentication"])
@@ -29,6 +31,11 @@ app.include_router(usercontent.router, prefix="/usercontent", tags=["UserContent
 @app.on_event("startup")
 async def startup_event():
     await create_tables()
+    await warm_pool()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await story.view_counter.flush()
 
 if __name__ == "__main__":
     import uvicorn
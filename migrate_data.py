@@ -0,0 +1,70 @@
+"""
+One-off data migrations for databases created before a model change.
+
+These rewrite or delete existing rows, so they are not part of the startup
+upgrades. Run them once per database, before starting a release that needs them:
+
+    python migrate_data.py
+
+Each step is recorded in schema_upgrades, like the startup upgrades, and is
+skipped on later runs.
+"""
+import asyncio
+
+from app.models import chapter, content_block, social, story, user  # noqa: F401  (registers the tables)
+from database import engine, create_tables, apply_upgrades
+
+DATA_MIGRATIONS = [
+    # Bookmarks had no unique key, so a user could hold several rows for one
+    # story. The newest row is kept, carrying the furthest reading progress of
+    # the duplicates; writes to bookmarks wait until the unique index exists.
+    ("bookmarks_unique", [
+        "LOCK TABLE bookmarks IN SHARE ROW EXCLUSIVE MODE",
+        "UPDATE bookmarks SET last_read_chapter = d.last_read_chapter FROM ("
+        "SELECT max(id) AS id, max(last_read_chapter) AS last_read_chapter FROM bookmarks "
+        "GROUP BY user_id, story_id HAVING count(*) > 1) d "
+        "WHERE bookmarks.id = d.id AND bookmarks.last_read_chapter IS DISTINCT FROM d.last_read_chapter",
+        "DELETE FROM bookmarks b USING bookmarks newer "
+        "WHERE newer.user_id = b.user_id AND newer.story_id = b.story_id AND newer.id > b.id",
+        "DROP INDEX IF EXISTS idx_bookmark_user_stories",
+        "CREATE UNIQUE INDEX IF NOT EXISTS unique_user_story_bookmark ON bookmarks (user_id, story_id)",
+    ]),
+    # Counters added by the social_counters upgrade start at 0. The SHARE lock
+    # makes likes, bookmarks and follows wait while their count is taken, so no
+    # change committed meanwhile is overwritten by the recount.
+    ("likes_count_backfill", [
+        "LOCK TABLE likes IN SHARE MODE",
+        "UPDATE stories SET likes_count = c.n FROM ("
+        "SELECT stories.id, count(likes.id) AS n FROM stories LEFT JOIN likes ON likes.story_id = stories.id "
+        "GROUP BY stories.id) c WHERE c.id = stories.id AND stories.likes_count <> c.n",
+    ]),
+    ("bookmarks_count_backfill", [
+        "LOCK TABLE bookmarks IN SHARE MODE",
+        "UPDATE stories SET bookmarks_count = c.n FROM ("
+        "SELECT stories.id, count(bookmarks.id) AS n FROM stories LEFT JOIN bookmarks ON bookmarks.story_id = stories.id "
+        "GROUP BY stories.id) c WHERE c.id = stories.id AND stories.bookmarks_count <> c.n",
+    ]),
+    ("follower_count_backfill", [
+        "LOCK TABLE user_follows IN SHARE MODE",
+        "UPDATE users SET follower_count = c.n FROM ("
+        "SELECT users.id, count(user_follows.id) AS n FROM users LEFT JOIN user_follows ON user_follows.followed_id = users.id "
+        "GROUP BY users.id) c WHERE c.id = users.id AND users.follower_count <> c.n",
+    ]),
+]
+
+
+async def migrate():
+    # The data steps rely on the columns the schema upgrades add
+    await create_tables()
+
+    # One transaction per step, so each step's locks are held only while it runs
+    for step in DATA_MIGRATIONS:
+        async with engine.begin() as conn:
+            applied = await conn.run_sync(apply_upgrades, [step])
+        print(f"{step[0]}: {'applied' if applied else 'already applied'}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())